@@ -16,6 +16,8 @@ if ROOT_DIR not in sys.path:
 from optikern.glyphs_integration import get_current_font
 from optikern.glyph_filter import get_kernable_glyphs
 from optikern.calibration import calibrate_reference_metrics
+from optikern import _cache
+from optikern._outline_cache import clear_outline_cache
 from optikern.edge_features import build_edge_features
 from optikern.raster_features import build_raster_profiles
 from optikern.clustering import build_classes, ClassifyConfig
@@ -28,18 +30,26 @@ def run():
         print("[OptiKern] No font open.")
         return
 
+    # Cached features of a previously run font are dropped here.
+    _cache.use_font(font)
+
     master = font.selectedFontMaster
     glyphs = get_kernable_glyphs(font)
 
     print(f"[OptiKern] Glyphs: {len(glyphs)}")
 
-    calibrate_reference_metrics(font, master)
-
-    edge = build_edge_features(font, glyphs, master)
-    raster = build_raster_profiles(font, glyphs, master)
+    calib = calibrate_reference_metrics(font, master)
 
     cfg = ClassifyConfig(use_raster=True)
-    L, R, _, _ = build_classes(edge, raster, cfg)
+    try:
+        # Batch builders: raster profiles come from the on-disk cache where the
+        # glyph is unchanged, and the rest are sampled in batches on a pool.
+        edge = build_edge_features(font, glyphs, master, calib=calib)
+        raster = build_raster_profiles(font, glyphs, master) if cfg.use_raster else None
+        L, R, _, _ = build_classes(edge, raster, cfg)
+    finally:
+        # Outline caches only share work within a run; release the layers.
+        clear_outline_cache()
 
     export_cfg = ExportConfig(prefix="OK_", overwrite=True)
     write_classes_to_glyphs(font, L, R, export_cfg)
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+_MAXSIZE = 50000
+
+MISSING = object()
+
+# (glyph name, master id, change token) -> SegmentFeatures, or None for a
+# layer without outline. Lives for the whole Glyphs session, so repeated runs
+# only recompute glyphs whose change token moved.
+_entries = OrderedDict()
+
+
+def get(key):
+    value = _entries.get(key, MISSING)
+    if value is not MISSING:
+        _entries.move_to_end(key)
+    return value
+
+
+def put(key, value):
+    _entries[key] = value
+    if len(_entries) > _MAXSIZE:
+        _entries.popitem(last=False)
+
+
+# Master ids of the font the previous run used; see use_font.
+_masters = frozenset()
+
+
+def use_font(font):
+    # Called at the start of every run. When another font is now active, the
+    # entries of masters it does not share are dropped rather than left to
+    # age out of the LRU.
+    global _masters
+    masters = frozenset(m.id for m in font.masters)
+    if masters != _masters:
+        for key in [k for k in _entries if k[1] not in masters]:
+            del _entries[key]
+        _masters = masters
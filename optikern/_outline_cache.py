@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+NODE_LINE, NODE_CURVE, NODE_OFFCURVE = 0, 1, 2
+
+# NSBezierPathElement values.
+_MOVE_TO, _LINE_TO, _CURVE_TO, _CLOSE_PATH, _QUAD_CURVE_TO = range(5)
+
+_CACHE_SIZE = 4096
+
+# NSBezierPath.defaultFlatness: how far a chord may stray from its curve.
+_FLATNESS = 0.6
+
+
+@dataclass
+class LayerArrays:
+    # Line segments as contiguous float32 columns, node type codes (int8),
+    # and layer bounds as (x_min, y_min, x_max, y_max) or None.
+    # edges holds every drawn element, implicit closes included, as (E, 4, 2)
+    # (start, control, control, end) with its element kind in edge_kinds;
+    # contour k owns edges[contours[k]:contours[k + 1]].
+    x1: np.ndarray
+    y1: np.ndarray
+    x2: np.ndarray
+    y2: np.ndarray
+    node_types: np.ndarray
+    bounds: tuple
+    edges: np.ndarray
+    edge_kinds: np.ndarray
+    contours: np.ndarray
+
+
+# id(layer) -> (layer, change token, value). Holding the layer keeps its
+# id from being reused by another object while the entry is alive.
+_cache = OrderedDict()  # LayerArrays
+_flat_cache = OrderedDict()  # (segs, starts) from _flatten_edges
+
+
+def _change_token(layer):
+    # The glyph's lastChange, plus recursively that of every component's base
+    # layer: completeBezierPath() includes components, so an edit to a base
+    # glyph must invalidate its composites. None when any part has no token.
+    glyph = getattr(layer, "parent", None)
+    token = getattr(glyph, "lastChange", None)
+    components = getattr(layer, "components", None)
+    if token is None or not components:
+        return token
+    parts = [token]
+    for component in components:
+        base = _change_token(component.componentLayer)
+        if base is None:
+            return None
+        parts.append(base)
+    return tuple(parts)
+
+
+def _walk_bezier(bp):
+    # Decodes the layer's NSBezierPath (components included) element by
+    # element into line segments (x1, y1, x2, y2), node type codes, and the
+    # edges / edge_kinds / contours described on LayerArrays.
+    # An implicit closing line is emitted as a line node, matching GSPath.
+    n = bp.elementCount()
+    segments = np.empty((n, 4), dtype=np.float32)
+    node_types = np.empty(3 * n, dtype=np.int8)
+    edges = np.empty((n + 1, 4, 2))
+    edge_kinds = np.empty(n + 1, dtype=np.int8)
+    contours = []
+    s = t = e = 0
+    x = y = sx = sy = 0.0
+
+    element_at = bp.elementAtIndex_associatedPoints_
+    for i in range(n):
+        kind, pts = element_at(i, None)
+        if kind == _MOVE_TO:
+            if (x, y) != (sx, sy):
+                # Filling closes an open subpath implicitly.
+                edges[e] = ((x, y), (x, y), (sx, sy), (sx, sy))
+                edge_kinds[e] = _LINE_TO
+                e += 1
+            contours.append(e)
+            x = sx = pts[0].x
+            y = sy = pts[0].y
+            continue
+
+        if kind == _LINE_TO or kind == _CLOSE_PATH:
+            if kind == _LINE_TO:
+                ex, ey = pts[0].x, pts[0].y
+            else:
+                ex, ey = sx, sy
+                if ex == x and ey == y:
+                    continue
+            segments[s] = (x, y, ex, ey)
+            s += 1
+            node_types[t] = NODE_LINE
+            t += 1
+            edges[e] = ((x, y), (x, y), (ex, ey), (ex, ey))
+            edge_kinds[e] = _LINE_TO
+        else:
+            offcurves = 2 if kind == _CURVE_TO else 1
+            end = pts[offcurves]
+            node_types[t:t + offcurves] = NODE_OFFCURVE
+            node_types[t + offcurves] = NODE_CURVE
+            t += offcurves + 1
+            ex, ey = end.x, end.y
+            c1, c2 = pts[0], pts[offcurves - 1]
+            edges[e] = ((x, y), (c1.x, c1.y), (c2.x, c2.y), (ex, ey))
+            edge_kinds[e] = kind
+        e += 1
+        x, y = ex, ey
+
+    if (x, y) != (sx, sy):
+        edges[e] = ((x, y), (x, y), (sx, sy), (sx, sy))
+        edge_kinds[e] = _LINE_TO
+        e += 1
+    contours.append(e)
+    # Drop empty contours (a bare moveTo) so every range is non-empty.
+    contours = np.unique(np.array(contours, dtype=np.int64))
+    return segments[:s], node_types[:t], edges[:e], edge_kinds[:e], contours
+
+
+def _path_bounds(bp):
+    # NSBezierPath.bounds is exact (curve extrema included) and is computed
+    # on the path already in hand, so GSLayer.bounds is never queried.
+    b = bp.bounds()
+    x, y = b.origin.x, b.origin.y
+    return (x, y, x + b.size.width, y + b.size.height)
+
+
+def _cached(cache, layer, build):
+    # Without a change token an edit to the same layer object is invisible,
+    # so such layers are rebuilt on every call and never stored.
+    token = _change_token(layer)
+    if token is None:
+        return build(layer)
+    key = id(layer)
+    hit = cache.get(key)
+    if hit is not None and hit[0] is layer and hit[1] == token:
+        cache.move_to_end(key)
+        return hit[2]
+
+    value = build(layer)
+    cache[key] = (layer, token, value)
+    if len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def _build_layer_arrays(layer):
+    bp = layer.completeBezierPath()
+    segments, node_types, edges, edge_kinds, contours = _walk_bezier(bp)
+    x1, y1, x2, y2 = np.ascontiguousarray(segments.T)
+    bounds = _path_bounds(bp) if node_types.size else None
+    return LayerArrays(x1, y1, x2, y2, node_types, bounds, edges, edge_kinds, contours)
+
+
+def _flatten_edges(edges, edge_kinds, contours):
+    # (S, 2, 2) chords within _FLATNESS of the edges, plus (K + 1,) offsets:
+    # contour k owns segs[starts[k]:starts[k + 1]]. Pure NumPy, so the raster
+    # pass never walks a flattened NSBezierPath over the bridge.
+    p0, c1, c2, p3 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    # Quadratics (control point stored twice) are raised to cubics.
+    quad = (edge_kinds == _QUAD_CURVE_TO)[:, None]
+    c1 = np.where(quad, p0 + 2.0 / 3.0 * (c1 - p0), c1)
+    c2 = np.where(quad, p3 + 2.0 / 3.0 * (c2 - p3), c2)
+
+    # Wang's bound: this many uniform steps keep every chord within _FLATNESS.
+    bend = np.maximum(
+        np.hypot(*(p0 - 2.0 * c1 + c2).T), np.hypot(*(c1 - 2.0 * c2 + p3).T)
+    )
+    steps = np.ceil(np.sqrt(0.75 * bend / _FLATNESS)).astype(np.int64)
+    steps[(steps < 1) | (edge_kinds == _LINE_TO)] = 1
+
+    first = np.concatenate(([0], np.cumsum(steps)))
+    owner = np.repeat(np.arange(steps.shape[0]), steps)
+    k = np.arange(first[-1]) - first[owner]
+    # Both ends of every chord; neighbours compute their shared end as the
+    # same k / steps, so the chords join exactly.
+    t = ((k[:, None] + np.array([0, 1])) / steps[owner, None])[..., None]
+    mt = 1.0 - t
+    segs = (
+        mt ** 3 * p0[owner, None]
+        + 3.0 * mt * mt * t * c1[owner, None]
+        + 3.0 * mt * t * t * c2[owner, None]
+        + t ** 3 * p3[owner, None]
+    )
+    return segs, first[contours]
+
+
+def _build_flat_segments(layer):
+    arrays = extract_layer_arrays(layer)
+    return _flatten_edges(arrays.edges, arrays.edge_kinds, arrays.contours)
+
+
+def extract_layer_arrays(layer):
+    return _cached(_cache, layer, _build_layer_arrays)
+
+
+def flattened_segments(layer):
+    # (segs, starts) of the flattened outline, for containment sampling.
+    # Cached separately so edge-only runs never pay for the flattening.
+    return _cached(_flat_cache, layer, _build_flat_segments)
+
+
+def forget_layer(layer):
+    # Drops one layer's entries once a streaming caller is done with it.
+    _cache.pop(id(layer), None)
+    _flat_cache.pop(id(layer), None)
+
+
+def clear_outline_cache():
+    _cache.clear()
+    _flat_cache.clear()
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import zipfile
+
+import numpy as np
+
+# Part of the file name; bump it whenever sampling or flattening changes so
+# profiles written by an older version are simply not found.
+_VERSION = 1
+
+_ROOT = os.path.expanduser("~/Library/Caches/OptiKern")
+
+
+def _path(font, master_id, columns, samples_per_band):
+    source = str(getattr(font, "filepath", None) or getattr(font, "familyName", ""))
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    name = f"profiles-v{_VERSION}-{master_id}-{columns}x{samples_per_band}.npz"
+    return os.path.join(_ROOT, digest, name)
+
+
+def load(font, master_id, columns, samples_per_band):
+    # ({(name, token): row}, (3, N, columns) float32 bottom/middle/top), or
+    # ({}, None) when there is no usable file; a truncated or corrupt file
+    # counts as missing and is rewritten by the next save.
+    try:
+        with np.load(_path(font, master_id, columns, samples_per_band)) as data:
+            keys = zip(data["names"].tolist(), data["tokens"].tolist())
+            dense = np.stack([data["bottom"], data["middle"], data["top"]])
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        return {}, None
+    return {key: row for row, key in enumerate(keys)}, dense
+
+
+def save(font, master_id, columns, samples_per_band, keys, dense):
+    # keys are (name, token) string pairs aligned with dense's rows.
+    path = _path(font, master_id, columns, samples_per_band)
+    names, tokens = zip(*keys) if keys else ((), ())
+    tmp = path[:-len(".npz")] + ".tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            tmp,
+            names=np.array(names, dtype=str),
+            tokens=np.array(tokens, dtype=str),
+            bottom=dense[0],
+            middle=dense[1],
+            top=dense[2],
+        )
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[OptiKern][Raster] Profile cache not written: {e}")
@@ -0,0 +1,191 @@
+import numpy as np
+
+try:
+    from numba import njit, types
+except ImportError:
+    njit = None
+
+
+def contour_bounds(segs, starts):
+    # (K, 4) float64 rows of (x_min, x_max, y_min, y_max), one per contour;
+    # contour k owns segs[starts[k]:starts[k + 1]].
+    xs = segs[:, :, 0]
+    ys = segs[:, :, 1]
+    heads = starts[:-1]
+    return np.stack([
+        np.minimum.reduceat(xs.min(axis=1), heads),
+        np.maximum.reduceat(xs.max(axis=1), heads),
+        np.minimum.reduceat(ys.min(axis=1), heads),
+        np.maximum.reduceat(ys.max(axis=1), heads),
+    ], axis=1)
+
+
+def _count_inside_loops(segs, starts, glyph_contours, boxes, unit_x, unit_y, out):
+    # Nonzero-winding containment of the unit grid (unit_x[i], unit_y[j]) mapped
+    # into glyph g's box (x_min, y_min, x_max, y_max), written to out[g, i, j];
+    # glyph g owns contours glyph_contours[g]:glyph_contours[g + 1].
+    # Scanline form over rows in increasing y (unit_y must be ascending): an
+    # active-edge list gains a segment once y reaches its lower end and drops
+    # it once y reaches its upper end, so each row only visits segments that
+    # span it. The row's crossings are sorted by x once and shared by every
+    # column through a binary search.
+    for g in range(boxes.shape[0]):
+        x_min, y_min, x_max, y_max = boxes[g]
+        width = x_max - x_min
+        height = y_max - y_min
+        first = starts[glyph_contours[g]]
+        n = starts[glyph_contours[g + 1]] - first
+        y_low = np.empty(n)
+        y_high = np.empty(n)
+        for s in range(n):
+            y_low[s] = min(segs[first + s, 0, 1], segs[first + s, 1, 1])
+            y_high[s] = max(segs[first + s, 0, 1], segs[first + s, 1, 1])
+        order = np.argsort(y_low)
+        active = np.empty(n, dtype=np.int64)
+        n_active = 0
+        entering = 0
+        x_cross = np.empty(n)
+        winding = np.empty(n + 1, dtype=np.int64)
+
+        for j in range(unit_y.shape[0]):
+            y = y_min + height * unit_y[j]
+            while entering < n and y_low[order[entering]] <= y:
+                active[n_active] = order[entering]
+                n_active += 1
+                entering += 1
+
+            m = 0
+            kept = 0
+            for a in range(n_active):
+                s = active[a]
+                if y_high[s] <= y:
+                    # Ends at or below this row, so also below every later one.
+                    continue
+                active[kept] = s
+                kept += 1
+
+                # y_low <= y < y_high: the segment straddles the row.
+                k = first + s
+                xa = segs[k, 0, 0]
+                ya = segs[k, 0, 1]
+                xb = segs[k, 1, 0]
+                yb = segs[k, 1, 1]
+                xc = xa + (y - ya) * (xb - xa) / (yb - ya)
+                d = 1 if yb > ya else -1
+                # Insertion sort by x; a row only crosses a handful of segments.
+                q = m
+                while q > 0 and x_cross[q - 1] > xc:
+                    x_cross[q] = x_cross[q - 1]
+                    winding[q] = winding[q - 1]
+                    q -= 1
+                x_cross[q] = xc
+                winding[q] = d
+                m += 1
+            n_active = kept
+
+            if m == 0:
+                # Nothing straddles this row, so no column can be inside.
+                out[g, :, j] = 0
+                continue
+
+            # winding[q] becomes the sum over the crossings at x_cross[q:m], i.e.
+            # the winding number of any x with x_cross[q - 1] <= x < x_cross[q].
+            winding[m] = 0
+            for q in range(m - 1, -1, -1):
+                winding[q] += winding[q + 1]
+            for i in range(unit_x.shape[0]):
+                x = x_min + width * unit_x[i]
+                out[g, i, j] = winding[np.searchsorted(x_cross[:m], x, side="right")] != 0
+
+
+def _count_inside_glyph(segs, starts, bounds, xs, ys, out):
+    px = np.repeat(xs, ys.shape[0])
+    py = np.tile(ys, xs.shape[0])
+    A_in = (
+        (px[:, None] >= bounds[:, 0]) & (px[:, None] <= bounds[:, 1])
+        & (py[:, None] >= bounds[:, 2]) & (py[:, None] <= bounds[:, 3])
+    )
+    hit = np.flatnonzero(A_in.any(axis=1))
+    flat = out.reshape(-1)
+    flat[:] = 0
+    if not hit.size:
+        return
+
+    # Only points inside some contour bbox, and only against those contours.
+    owner = np.repeat(np.arange(bounds.shape[0]), np.diff(starts))
+    active = A_in[hit][:, owner]
+    x = px[hit][:, None]
+    y = py[hit][:, None]
+    xa, ya = segs[:, 0, 0], segs[:, 0, 1]
+    xb, yb = segs[:, 1, 0], segs[:, 1, 1]
+    # +1 where the segment crosses y upwards, -1 downwards, 0 elsewhere; the
+    # winding is then one signed reduction instead of two masked counts.
+    direction = (yb > y).astype(np.int8) - (ya > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = xa + (y - ya) * (xb - xa) / (yb - ya)
+    right = active & (x < x_cross)
+    winding = np.einsum("ij,ij->i", direction, right.view(np.int8), dtype=np.int64)
+    flat[hit] = winding != 0
+
+
+def _count_inside_numpy(segs, starts, bounds, glyph_contours, boxes, unit_x, unit_y, out):
+    x_min, y_min, x_max, y_max = boxes.T[:, :, None]
+    xs = x_min + (x_max - x_min) * unit_x
+    ys = y_min + (y_max - y_min) * unit_y
+    for g in range(boxes.shape[0]):
+        c0, c1 = glyph_contours[g], glyph_contours[g + 1]
+        first, last = starts[c0], starts[c1]
+        if first == last:
+            out[g] = 0
+            continue
+        _count_inside_glyph(
+            segs[first:last], starts[c0:c1 + 1] - first, bounds[c0:c1], xs[g], ys[g], out[g]
+        )
+
+
+# nogil rather than parallel=True: build_raster_profiles already spreads
+# batches over threads, and Numba's default threading layer must not be
+# entered from several threads at once.
+_count_inside_jit = None
+if njit is not None:
+    # Explicit signature: compiled (or loaded from the on-disk cache) at import
+    # instead of on the first profile build. Argument order as in count_inside;
+    # all arrays are C-contiguous (concat_outlines and np.empty guarantee it) and
+    # the unit grids are the read-only arrays from raster_features._unit_grid.
+    _COUNT_INSIDE_SIGNATURE = types.void(
+        types.float64[:, :, ::1],
+        types.int64[::1],
+        types.int64[::1],
+        types.float64[:, ::1],
+        types.Array(types.float64, 1, "C", readonly=True),
+        types.Array(types.float64, 1, "C", readonly=True),
+        types.uint8[:, :, ::1],
+    )
+    _count_inside_jit = njit(_COUNT_INSIDE_SIGNATURE, cache=True, fastmath=True, nogil=True)(
+        _count_inside_loops
+    )
+
+
+def concat_outlines(outlines):
+    # Packs per-glyph (segs, starts) into one batch: all segments, global
+    # contour offsets, and (G + 1,) glyph_contours offsets into those.
+    seg_counts = [segs.shape[0] for segs, _ in outlines]
+    seg_base = np.cumsum([0] + seg_counts[:-1])
+    heads = [starts[:-1] + base for (_, starts), base in zip(outlines, seg_base)]
+    glyph_contours = np.cumsum([0] + [h.shape[0] for h in heads]).astype(np.int64)
+    starts = np.concatenate(heads + [np.array([sum(seg_counts)])]).astype(np.int64)
+    segs = np.concatenate([segs for segs, _ in outlines]) if outlines else np.empty((0, 2, 2))
+    return segs, starts, glyph_contours
+
+
+def count_inside(segs, starts, glyph_contours, boxes, unit_x, unit_y, out):
+    # One kernel call for a whole batch of glyphs; see concat_outlines.
+    # boxes is (G, 4) sampling bounds, unit_x / unit_y the grid in [0, 1].
+    if not segs.shape[0]:
+        out[:] = 0
+        return
+    if _count_inside_jit is not None:
+        _count_inside_jit(segs, starts, glyph_contours, boxes, unit_x, unit_y, out)
+    else:
+        bounds = contour_bounds(segs, starts)
+        _count_inside_numpy(segs, starts, bounds, glyph_contours, boxes, unit_x, unit_y, out)
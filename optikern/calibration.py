@@ -8,13 +8,27 @@ class CalibrationData:
     topheavy_scale: float
 
 
+_STEM_REFERENCES = ("M", "H")
+
+
+def _find_glyph(font, names):
+    # Indexed lookups only; font.glyphs[name] is None for a missing glyph.
+    for n in names:
+        g = font.glyphs[n]
+        if g is not None:
+            return g
+    return None
+
+
 def calibrate_reference_metrics(font, master):
-    M = font.glyphs["M"]
-    layer = M.layers[master.id]
-    bounds = layer.bounds
+    ref = _find_glyph(font, _STEM_REFERENCES)
+    if ref is not None:
+        vertical_spacing = ref.layers[master.id].bounds.size.height
+    else:
+        vertical_spacing = master.capHeight
 
     data = CalibrationData(
-        vertical_spacing=bounds.size.height,
+        vertical_spacing=vertical_spacing,
         diagonal_scale=1.0,
         round_scale=1.0,
         topheavy_scale=1.0,
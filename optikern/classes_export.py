@@ -1,16 +1,36 @@
 from dataclasses import dataclass
 
+from .clustering import _L_NAMES, _R_NAMES
+
 @dataclass
 class ExportConfig:
     prefix: str = "OK_"
     overwrite: bool = True
 
 
+def _ensure_class(font, existing, name):
+    c = existing.get(name)
+    if c is None:
+        c = existing[name] = font.classes.appendNewClass(name)
+    return c
+
+
 def write_classes_to_glyphs(font, L, R, cfg):
-    for cname, glyphs in {**L, **R}.items():
-        name = cfg.prefix + cname
-        c = font.classes[name] if name in font.classes else font.classes.appendNewClass(name)
-        c.code = " ".join(sorted(glyphs))
+    # L / R come from build_classes, whose member lists are already sorted.
+    existing = {c.name: c for c in font.classes}
+    classes = {**L, **R}
+
+    for cname, glyphs in classes.items():
+        c = _ensure_class(font, existing, cfg.prefix + cname)
+        c.code = " ".join(glyphs)
         c.automatic = False
 
+    if cfg.overwrite:
+        # A bucket that emptied since the last run would otherwise keep its
+        # old class and members.
+        for cname in _L_NAMES + _R_NAMES:
+            name = cfg.prefix + cname
+            if cname not in classes and name in existing:
+                del font.classes[name]
+
     print("[OptiKern][Export] OK")
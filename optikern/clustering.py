@@ -1,16 +1,152 @@
+import sys
 from dataclasses import dataclass
 
+import numpy as np
+
+from .edge_features import _FIELDS, EdgeFeaturesSoA
+
+_BUCKETS = ("round", "diag", "vert", "open", "default")
+# Class names per side, indexed like _BUCKETS.
+_L_NAMES = tuple(sys.intern(f"L_{b}") for b in _BUCKETS)
+_R_NAMES = tuple(sys.intern(f"R_{b}") for b in _BUCKETS)
+
+
 @dataclass
 class ClassifyConfig:
     use_raster: bool = True
+    roundness_hi: float = 0.35
+    diagonal_hi: float = 0.3
+    # A rectilinear outline has as many vertical as horizontal lines (0.5),
+    # so "vert" needs stems to actually dominate.
+    vertical_hi: float = 0.6
+    emptiness_hi: float = 0.5
+    edge_columns: int = 3
+
+
+def _pick_bucket(is_round, is_diag, is_vert, edge_open):
+    # Reference logic; only evaluated at import to fill _BUCKET_TABLE.
+    # Openness is not measured yet (always 1.0), so only an empty edge
+    # column makes a glyph "open".
+    if is_round:
+        return "round"
+    if is_diag:
+        return "diag"
+    if is_vert and not edge_open:
+        return "vert"
+    if edge_open:
+        return "open"
+    return "default"
+
+
+# Indexed by is_round | is_diag << 1 | is_vert << 2 | edge_open << 3.
+_BUCKET_TABLE = [_pick_bucket(c & 1, c & 2, c & 4, c & 8) for c in range(16)]
+_CODE_TO_BUCKET = np.array([_BUCKETS.index(b) for b in _BUCKET_TABLE], dtype=np.uint8)
+
+
+def _edge_emptiness(top, middle, bottom, k):
+    # Rows are glyphs; returns (emptiness_L, emptiness_R) over the k outer columns.
+    ink_L = (top[:, :k] + middle[:, :k] + bottom[:, :k]).mean(axis=1) / 3.0
+    ink_R = (top[:, -k:] + middle[:, -k:] + bottom[:, -k:]).mean(axis=1) / 3.0
+    return np.clip(1.0 - ink_L, 0.0, 1.0), np.clip(1.0 - ink_R, 0.0, 1.0)
+
+
+def _emptiness_columns(names, raster, cfg):
+    emptiness_L = np.zeros(len(names), dtype=np.float32)
+    emptiness_R = np.zeros(len(names), dtype=np.float32)
+    if not cfg.use_raster or not raster:
+        return emptiness_L, emptiness_R
+
+    rows = raster.rows_for(names)
+    have = rows >= 0
+    rows = rows[have]
+    emptiness_L[have], emptiness_R[have] = _edge_emptiness(
+        raster.top[rows], raster.middle[rows], raster.bottom[rows], cfg.edge_columns
+    )
+    return emptiness_L, emptiness_R
+
+
+_STREAM_DTYPE = np.dtype([(f, np.float32) for f in _FIELDS])
+
+
+def _columns_from_stream(stream, cfg):
+    # Reduce each (name, EdgeFeatures, RasterEdgeProfile) as it arrives;
+    # only scalar feature columns and raw profile rows are kept.
+    names = []
+    profiled = []
+    profiles = []
+    use_raster = cfg.use_raster
+
+    def rows():
+        for gname, ef, prof in stream:
+            if use_raster and prof is not None:
+                profiled.append(len(names))
+                profiles.append((prof.top, prof.middle, prof.bottom))
+            names.append(gname)
+            yield tuple(getattr(ef, f) for f in _FIELDS)
+
+    table = np.fromiter(rows(), dtype=_STREAM_DTYPE)
+    edge = EdgeFeaturesSoA(
+        np.array(names, dtype=object),
+        *(np.ascontiguousarray(table[f]) for f in _FIELDS),
+    )
+
+    emptiness_L = np.zeros(len(names), dtype=np.float32)
+    emptiness_R = np.zeros(len(names), dtype=np.float32)
+    if profiles:
+        dense = np.array(profiles, dtype=np.float32)
+        emptiness_L[profiled], emptiness_R[profiled] = _edge_emptiness(
+            dense[:, 0], dense[:, 1], dense[:, 2], cfg.edge_columns
+        )
+    return edge, emptiness_L, emptiness_R
+
+
+def _classify(cfg, vm, dm, rn, e):
+    # uint8 _BUCKET_TABLE codes for whole feature columns.
+    code = (rn >= cfg.roundness_hi).astype(np.uint8)
+    code |= (dm >= cfg.diagonal_hi).astype(np.uint8) << 1
+    code |= (vm >= cfg.vertical_hi).astype(np.uint8) << 2
+    code |= (e >= cfg.emptiness_hi).astype(np.uint8) << 3
+    return code
+
+
+def _group(names, codes, by_name, class_names):
+    # `by_name` orders glyphs alphabetically; the stable sort on bucket keeps
+    # that order inside each group, so member lists come out already sorted.
+    classes, glyph_to = {}, {}
+    if not len(codes):
+        return classes, glyph_to
+
+    buckets = _CODE_TO_BUCKET[codes]
+    order = by_name[np.argsort(buckets[by_name], kind="stable")]
+    sorted_buckets = buckets[order]
+    cuts = np.flatnonzero(np.diff(sorted_buckets)) + 1
+    for b, members in zip(sorted_buckets[np.r_[0, cuts]], np.split(names[order], cuts)):
+        cname = class_names[b]
+        classes[cname] = members.tolist()
+        for gname in classes[cname]:
+            glyph_to[gname] = cname
+    return classes, glyph_to
 
 
 def build_classes(edge, raster, cfg):
-    L, R = {}, {}
+    # `edge` is either EdgeFeaturesSoA (with `raster` from build_raster_profiles)
+    # or an iterator from edge_features.iter_features, in which case `raster` is unused.
+    # Returns (L, R, glyph_to_L, glyph_to_R); every class member list is sorted
+    # by glyph name, which classes_export relies on.
+    if isinstance(edge, EdgeFeaturesSoA):
+        emptiness_L, emptiness_R = _emptiness_columns(edge.names, raster, cfg)
+    else:
+        edge, emptiness_L, emptiness_R = _columns_from_stream(edge, cfg)
+
+    names = edge.names
+    features = (edge.vertical_mass, edge.diagonal_mass, edge.roundness)
+
+    code_L = _classify(cfg, *features, emptiness_L)
+    code_R = _classify(cfg, *features, emptiness_R)
 
-    for name in edge.keys():
-        L.setdefault("L_default", []).append(name)
-        R.setdefault("R_default", []).append(name)
+    by_name = np.argsort(names, kind="stable")
+    L, glyph_to_L = _group(names, code_L, by_name, _L_NAMES)
+    R, glyph_to_R = _group(names, code_R, by_name, _R_NAMES)
 
     print("[OptiKern][Clustering] OK")
-    return L, R, {}, {}
+    return L, R, glyph_to_L, glyph_to_R
@@ -1,4 +1,17 @@
-from dataclasses import dataclass
+import sys
+from collections import namedtuple
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+from . import _cache
+from ._outline_cache import NODE_CURVE, NODE_OFFCURVE, _change_token, extract_layer_arrays, forget_layer
+from .raster_features import _build_profile_for_layer
 
 @dataclass
 class EdgeFeatures:
@@ -11,33 +24,183 @@ class EdgeFeatures:
     top_distribution: float
 
 
-def build_edge_features(font, glyphs, master):
-    features = {}
+_FIELDS = tuple(f.name for f in fields(EdgeFeatures))
+
+
+@dataclass
+class EdgeFeaturesSoA:
+    # One float32 column per EdgeFeatures field, aligned with `names`.
+    names: np.ndarray
+    vertical_mass: np.ndarray
+    diagonal_mass: np.ndarray
+    roundness: np.ndarray
+    openness: np.ndarray
+    baseline_distribution: np.ndarray
+    xheight_distribution: np.ndarray
+    top_distribution: np.ndarray
+    _index: dict = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._lookup()
+
+    def __getitem__(self, name):
+        i = self._lookup()[name]
+        return EdgeFeatures(*(float(getattr(self, f)[i]) for f in _FIELDS))
+
+    def keys(self):
+        return self.names.tolist()
+
+    def _lookup(self):
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.names.tolist())}
+        return self._index
+
+
+_DIAGONAL_MIN = 5.0
+
+SegmentFeatures = namedtuple("SegmentFeatures", "vertical diagonal roundness")
+
+
+def _scan_segments(x1, y1, x2, y2, node_type_codes):
+    n = x1.shape[0]
+    vertical = 0
+    diagonal = 0
+    for i in range(n):
+        dx = abs(x2[i] - x1[i])
+        dy = abs(y2[i] - y1[i])
+        if dx < dy:
+            vertical += 1
+        if dx > _DIAGONAL_MIN and dy > _DIAGONAL_MIN:
+            diagonal += 1
+
+    # Curve share of the on-curve nodes; off-curve handles are not counted,
+    # or a cubic-only outline could never exceed 1/3.
+    curves = 0
+    oncurve = 0
+    for i in range(node_type_codes.shape[0]):
+        if node_type_codes[i] == NODE_CURVE:
+            curves += 1
+        if node_type_codes[i] != NODE_OFFCURVE:
+            oncurve += 1
+
+    roundness = curves / max(1, oncurve)
+    if n == 0:
+        return 0.0, 0.0, roundness
+    return vertical / n, diagonal / n, roundness
+
+
+_scan_segments_jit = njit(cache=True, fastmath=True)(_scan_segments) if njit else None
+
+
+def _features_from_arrays(x1, y1, x2, y2, node_types):
+    if _scan_segments_jit is not None:
+        return SegmentFeatures(*_scan_segments_jit(x1, y1, x2, y2, node_types))
+
+    oncurve = np.count_nonzero(node_types != NODE_OFFCURVE)
+    curves = np.count_nonzero(node_types == NODE_CURVE)
+    roundness = curves / max(1, oncurve)
+
+    if x1.size == 0:
+        return SegmentFeatures(0.0, 0.0, roundness)
+
+    dx = np.abs(x2 - x1)
+    dy = np.abs(y2 - y1)
+    vertical = float((dx < dy).mean())
+    diagonal = float(((dx > _DIAGONAL_MIN) & (dy > _DIAGONAL_MIN)).mean())
+    return SegmentFeatures(vertical, diagonal, roundness)
+
+
+def _layer_features(arrays):
+    return _features_from_arrays(arrays.x1, arrays.y1, arrays.x2, arrays.y2, arrays.node_types)
+
+
+def _segment_features(name, master_id, layer):
+    # None when the layer has no outline. Memoized across runs whenever the
+    # glyph exposes a change token; without one there is nothing safe to key on.
+    token = _change_token(layer)
+    key = (name, master_id, token)
+    if token is not None:
+        sf = _cache.get(key)
+        if sf is not _cache.MISSING:
+            return sf
+
+    arrays = extract_layer_arrays(layer)
+    sf = _layer_features(arrays) if arrays.node_types.size else None
+    if token is not None:
+        _cache.put(key, sf)
+    return sf
+
+
+def _feature_scales(calib):
+    # Per-column multipliers for (vertical, diagonal, roundness, openness).
+    # vertical_spacing is a height in font units, not a ratio, so the
+    # vertical column is left unscaled.
+    return np.array([1.0, calib.diagonal_scale, calib.round_scale, 1.0], dtype=np.float32)
+
+
+def build_edge_features(font, glyphs, master, *, calib):
+    master_id = master.id
+
+    cols = np.ones((len(_FIELDS), len(glyphs)), dtype=np.float32)
+    names = []
+
+    for g in glyphs:
+        layer = g.layers[master_id]
+        if not layer:
+            continue
+        name = sys.intern(str(g.name))
+        sf = _segment_features(name, master_id, layer)
+        if sf is None:
+            continue
+
+        i = len(names)
+        cols[0, i] = sf.vertical
+        cols[1, i] = sf.diagonal
+        cols[2, i] = sf.roundness
+        names.append(name)
+
+    features = _assemble(names, cols[:, :len(names)], calib)
+
+    print("[OptiKern][EdgeFeatures] OK")
+    return features
+
+
+def _assemble(names, cols, calib):
+    cols[:4] *= _feature_scales(calib)[:, None]
+    return EdgeFeaturesSoA(np.array(names, dtype=object), *cols)
+
+
+def iter_features(font, glyphs, master, *, calib, use_raster=True, columns=24, samples_per_band=12):
+    # Lazily yields (name, EdgeFeatures, RasterEdgeProfile or None), one glyph at a time.
+    master_id = master.id
+    _, diagonal_scale, round_scale, _ = _feature_scales(calib).tolist()
+
     for g in glyphs:
-        layer = g.layers[master.id]
-        if not layer or not layer.paths:
+        layer = g.layers[master_id]
+        if not layer:
+            continue
+        name = sys.intern(str(g.name))
+        sf = _segment_features(name, master_id, layer)
+        prof = None
+        if sf is not None and use_raster:
+            prof = _build_profile_for_layer(layer, columns, samples_per_band)
+        # Only the glyph in hand stays live; nothing later reads this layer.
+        forget_layer(layer)
+        if sf is None:
             continue
 
-        vertical = 0
-        diagonal = 0
-        curves = 0
-        total = 0
-
-        for p in layer.paths:
-            for n in p.nodes:
-                total += 1
-                if n.type == "curve":
-                    curves += 1
-
-        features[g.name] = EdgeFeatures(
-            vertical_mass=0.3,
-            diagonal_mass=0.3,
-            roundness=curves / max(1, total),
+        ef = EdgeFeatures(
+            vertical_mass=sf.vertical,
+            diagonal_mass=sf.diagonal * diagonal_scale,
+            roundness=sf.roundness * round_scale,
             openness=1.0,
             baseline_distribution=1.0,
             xheight_distribution=1.0,
             top_distribution=1.0,
         )
+        yield name, ef, prof
 
-    print("[OptiKern][EdgeFeatures] OK")
-    return features
+    print("[OptiKern][Features] OK")
@@ -1,50 +1,176 @@
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+from . import _profile_cache
+from ._outline_cache import _change_token, extract_layer_arrays, flattened_segments
+from ._raster_kernels import concat_outlines, count_inside
 
 @dataclass
 class RasterEdgeProfile:
-    top: list
-    middle: list
-    bottom: list
+    # float32 densities per column, one array per horizontal band.
+    top: np.ndarray
+    middle: np.ndarray
+    bottom: np.ndarray
+
+
+@dataclass
+class RasterProfiles:
+    # Dense (N, columns) float32 matrices, row i belonging to names[i].
+    names: np.ndarray
+    top: np.ndarray
+    middle: np.ndarray
+    bottom: np.ndarray
+    _index: dict = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._lookup()
+
+    def get(self, name, default=None):
+        i = self._lookup().get(name)
+        if i is None:
+            return default
+        return RasterEdgeProfile(self.top[i], self.middle[i], self.bottom[i])
+
+    def keys(self):
+        return self.names.tolist()
+
+    def rows_for(self, names):
+        # Row index of each name, -1 where the glyph has no profile.
+        if len(names) == len(self.names) and (names == self.names).all():
+            return np.arange(len(names))
+        lookup = self._lookup()
+        return np.fromiter((lookup.get(n, -1) for n in names), dtype=np.intp, count=len(names))
+
+    def _lookup(self):
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.names.tolist())}
+        return self._index
+
+
+# Glyphs per kernel call; larger fonts split into batches spread over threads.
+_BATCH_GLYPHS = 256
+
+
+def _layer_outline(layer):
+    # Everything the profile needs from Glyphs: (bounds, segs, starts), or None.
+    # Touches PyObjC, so it must run on the calling thread.
+    if not layer:
+        return None
+    bounds = extract_layer_arrays(layer).bounds
+    if bounds is None or bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+        return None
+    segs, starts = flattened_segments(layer)
+    return bounds, segs, starts
+
+
+@lru_cache(maxsize=8)
+def _unit_grid(columns, samples_per_band):
+    # Cell centres in [0, 1]: columns across the width, samples_per_band rows
+    # per band, bottom band first. Shared by every glyph; the kernel maps them
+    # into each glyph's bounds.
+    unit_x = (np.arange(columns) + 0.5) / columns
+    unit_y = (np.arange(3 * samples_per_band) + 0.5) / (3 * samples_per_band)
+    unit_x.flags.writeable = unit_y.flags.writeable = False
+    return unit_x, unit_y
+
+
+def _densities_for_outlines(outlines, columns, samples_per_band):
+    # (3, G, columns) float32 densities, bottom band first, for G outlines
+    # sampled in a single kernel call. Pure NumPy / Numba; safe on worker threads.
+    boxes = np.array([outline[0] for outline in outlines], dtype=np.float64).reshape(-1, 4)
+    segs, starts, glyph_contours = concat_outlines([outline[1:] for outline in outlines])
+
+    inside = np.empty((len(outlines), columns, 3 * samples_per_band), dtype=np.uint8)
+    count_inside(segs, starts, glyph_contours, boxes, *_unit_grid(columns, samples_per_band), inside)
+    inside = inside.reshape(len(outlines), columns, 3, samples_per_band)
+    return inside.mean(axis=-1, dtype=np.float32).transpose(2, 0, 1)
+
 
+def _build_profile_for_layer(layer, columns, samples_per_band):
+    outline = _layer_outline(layer)
+    if outline is None:
+        return None
+    bottom, middle, top = _densities_for_outlines([outline], columns, samples_per_band)[:, 0]
+    return RasterEdgeProfile(top=top, middle=middle, bottom=bottom)
 
-def _sample_density(path, x, y1, y2, samples):
-    from AppKit import NSPoint
 
-    inside = 0
-    step = (y2 - y1) / samples
-    y = y1
-    for _ in range(samples):
-        if path.containsPoint_(NSPoint(x, y)):
-            inside += 1
-        y += step
-    return inside / samples
+def _store_profiles(font, master_id, columns, samples_per_band, keys, dense, stored_rows, stored):
+    # Writes this call's profiles plus stored ones for glyphs it did not cover,
+    # as long as those still exist: rows of deleted or renamed glyphs are
+    # dropped, so the file only ever holds the font's current glyphs.
+    seen = {key[0] for key in keys if key is not None}
+    fresh = [(key, i) for i, key in enumerate(keys) if key is not None]
+    kept = [
+        (key, row) for key, row in stored_rows.items()
+        if key[0] not in seen and font.glyphs[key[0]] is not None
+    ]
+    parts = [dense[:, [i for _, i in fresh]]]
+    if kept:
+        parts.append(stored[:, [row for _, row in kept]])
+    _profile_cache.save(
+        font, master_id, columns, samples_per_band,
+        [key for key, _ in fresh + kept], np.concatenate(parts, axis=1),
+    )
 
 
-def build_raster_profiles(font, glyphs, master, columns=24):
-    profiles = {}
+def build_raster_profiles(
+    font, glyphs, master, columns=24, samples_per_band=12, workers=None, disk_cache=True
+):
+    # With disk_cache, a glyph whose change token matches the profile stored
+    # by an earlier call is read back instead of sampled; see _profile_cache.
+    master_id = master.id
+    stored_rows, stored = (
+        _profile_cache.load(font, master_id, columns, samples_per_band) if disk_cache else ({}, None)
+    )
+    names = []
+    keys = []  # (name, token) strings, None when the glyph has no change token
+    rows = []  # row in `stored`, or -1 when sampled in this call
+    outlines = []
+    dirty = False  # a glyph with a change token was sampled, so the file is stale
 
     for g in glyphs:
-        layer = g.layers[master.id]
-        if not layer or not layer.bounds:
-            continue
+        layer = g.layers[master_id]
+        token = _change_token(layer)
+        key = (str(g.name), str(token)) if token is not None else None
+        row = stored_rows.get(key, -1)
+        if row < 0:
+            outline = _layer_outline(layer)
+            if outline is None:
+                continue
+            outlines.append(outline)
+            dirty = dirty or key is not None
+        names.append(g.name)
+        keys.append(key)
+        rows.append(row)
 
-        path = layer.completeBezierPath()
-        b = layer.bounds
+    def densities(batch):
+        return _densities_for_outlines(batch, columns, samples_per_band)
 
-        top, mid, bot = [], [], []
+    batches = [outlines[i:i + _BATCH_GLYPHS] for i in range(0, len(outlines), _BATCH_GLYPHS)]
+    if len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            sampled = np.concatenate(list(pool.map(densities, batches)), axis=1)
+    else:
+        sampled = densities(outlines)
 
-        for i in range(columns):
-            x = b.origin.x + b.size.width * (i + 0.5) / columns
-            y0 = b.origin.y
-            y1 = y0 + b.size.height / 3
-            y2 = y1 + b.size.height / 3
-            y3 = b.origin.y + b.size.height
+    rows = np.array(rows, dtype=np.intp)
+    reused = rows >= 0
+    dense = np.empty((3, len(names), columns), dtype=np.float32)
+    dense[:, ~reused] = sampled
+    if reused.any():
+        dense[:, reused] = stored[:, rows[reused]]
 
-            bot.append(_sample_density(path, x, y0, y1, 8))
-            mid.append(_sample_density(path, x, y1, y2, 8))
-            top.append(_sample_density(path, x, y2, y3, 8))
+    if disk_cache and dirty:
+        _store_profiles(font, master_id, columns, samples_per_band, keys, dense, stored_rows, stored)
 
-        profiles[g.name] = RasterEdgeProfile(top, mid, bot)
+    bottom, middle, top = dense
+    profiles = RasterProfiles(np.array(names, dtype=object), top, middle, bottom)
 
-    print("[OptiKern][Raster] OK")
+    print(f"[OptiKern][Raster] OK ({len(names)} glyphs, {int(reused.sum())} from cache)")
     return profiles
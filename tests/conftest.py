@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from optikern import _cache
+from optikern._outline_cache import clear_outline_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches(monkeypatch):
+    # Fakes reuse glyph names and change tokens across tests.
+    monkeypatch.setattr(_cache, "_entries", type(_cache._entries)())
+    monkeypatch.setattr(_cache, "_masters", frozenset())
+    clear_outline_cache()
+    yield
+    clear_outline_cache()
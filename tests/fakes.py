@@ -0,0 +1,86 @@
+# Minimal stand-ins for the Glyphs / AppKit objects OptiKern reads, so the
+# numeric code can run without Glyphs.
+from types import SimpleNamespace
+
+MOVE_TO, LINE_TO, CURVE_TO, CLOSE_PATH, QUAD_CURVE_TO = range(5)
+
+
+def pt(x, y):
+    return SimpleNamespace(x=float(x), y=float(y))
+
+
+class FakeBezierPath:
+    # NSBezierPath subset: elementCount, elementAtIndex_associatedPoints_, bounds.
+    def __init__(self, elements):
+        self.elements = [(kind, tuple(pt(*p) for p in points)) for kind, points in elements]
+
+    def elementCount(self):
+        return len(self.elements)
+
+    def elementAtIndex_associatedPoints_(self, i, _):
+        return self.elements[i]
+
+    def bounds(self):
+        # Control-point hull; exact for the straight outlines used in tests.
+        xs = [p.x for _, points in self.elements for p in points]
+        ys = [p.y for _, points in self.elements for p in points]
+        return SimpleNamespace(
+            origin=SimpleNamespace(x=min(xs), y=min(ys)),
+            size=SimpleNamespace(width=max(xs) - min(xs), height=max(ys) - min(ys)),
+        )
+
+
+def polygon_elements(*polygons):
+    elements = []
+    for polygon in polygons:
+        elements.append((MOVE_TO, [polygon[0]]))
+        elements.extend((LINE_TO, [p]) for p in polygon[1:])
+        elements.append((CLOSE_PATH, []))
+    return elements
+
+
+class FakeLayer:
+    def __init__(self, parent, elements, components=()):
+        self.parent = parent
+        self.elements = elements
+        # GSComponent subset: componentLayer is the base glyph's layer.
+        self.components = tuple(SimpleNamespace(componentLayer=c) for c in components)
+
+    def __bool__(self):
+        return bool(self.elements or self.components)
+
+    def decomposed(self):
+        elements = list(self.elements)
+        for component in self.components:
+            elements += component.componentLayer.decomposed()
+        return elements
+
+    def completeBezierPath(self):
+        # Like GSLayer, the complete path includes decomposed components.
+        return FakeBezierPath(self.decomposed())
+
+
+class FakeGlyph:
+    def __init__(self, name, elements, master_id="m", last_change=1, components=()):
+        self.name = name
+        self.lastChange = last_change
+        bases = [c.layers[master_id] for c in components]
+        self.layers = {master_id: FakeLayer(self, elements, bases)}
+
+
+class FakeGlyphs(list):
+    # GSFont.glyphs subset: indexing by name gives None for a missing glyph.
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next((g for g in self if g.name == key), None)
+        return super().__getitem__(key)
+
+
+MASTER = SimpleNamespace(id="m")
+
+
+class FakeFont:
+    def __init__(self, glyphs=(), filepath="/fonts/Test.glyphs", masters=(MASTER,)):
+        self.filepath = filepath
+        self.glyphs = FakeGlyphs(glyphs)
+        self.masters = list(masters)
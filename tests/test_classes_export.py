@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from optikern.classes_export import ExportConfig, write_classes_to_glyphs
+
+
+class FakeClasses(list):
+    # GSFont.classes subset: iteration, appendNewClass, deletion by name.
+    def appendNewClass(self, name):
+        c = SimpleNamespace(name=name, code="", automatic=True)
+        self.append(c)
+        return c
+
+    def __delitem__(self, name):
+        self.remove(next(c for c in self if c.name == name))
+
+
+def test_emptied_buckets_are_removed():
+    font = SimpleNamespace(classes=FakeClasses())
+    font.classes.appendNewClass("Uppercase")
+    write_classes_to_glyphs(font, {"L_round": ["O"], "L_vert": ["H"]}, {"R_round": ["O", "H"]}, ExportConfig())
+    write_classes_to_glyphs(font, {"L_round": ["H", "O"]}, {"R_round": ["H", "O"]}, ExportConfig())
+
+    codes = {c.name: c.code for c in font.classes}
+    assert codes == {"Uppercase": "", "OK_L_round": "H O", "OK_R_round": "H O"}
+
+
+def test_without_overwrite_old_classes_stay():
+    font = SimpleNamespace(classes=FakeClasses())
+    cfg = ExportConfig(overwrite=False)
+    write_classes_to_glyphs(font, {"L_vert": ["H"]}, {}, cfg)
+    write_classes_to_glyphs(font, {"L_round": ["O"]}, {}, cfg)
+    assert [c.name for c in font.classes] == ["OK_L_vert", "OK_L_round"]
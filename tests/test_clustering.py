@@ -0,0 +1,101 @@
+import numpy as np
+
+from fakes import CLOSE_PATH, CURVE_TO, MASTER, MOVE_TO, FakeGlyph, polygon_elements
+from optikern.calibration import CalibrationData
+from optikern.clustering import ClassifyConfig, _pick_bucket, build_classes
+from optikern import _outline_cache
+from optikern.edge_features import EdgeFeaturesSoA, build_edge_features, iter_features
+from optikern.raster_features import RasterProfiles, build_raster_profiles
+
+CALIB = CalibrationData(vertical_spacing=700.0, diagonal_scale=1.0, round_scale=1.0, topheavy_scale=1.0)
+
+# Four cubics, the usual way an "O" is drawn.
+O_ELEMENTS = [
+    (MOVE_TO, [(250, 0)]),
+    (CURVE_TO, [(400, 0), (500, 200), (500, 350)]),
+    (CURVE_TO, [(500, 500), (400, 700), (250, 700)]),
+    (CURVE_TO, [(100, 700), (0, 500), (0, 350)]),
+    (CURVE_TO, [(0, 200), (100, 0), (250, 0)]),
+    (CLOSE_PATH, []),
+]
+I_ELEMENTS = polygon_elements([(0, 0), (100, 0), (100, 700), (0, 700)])
+
+
+def _classes(glyphs):
+    edge = build_edge_features(None, glyphs, MASTER, calib=CALIB)
+    raster = build_raster_profiles(None, glyphs, MASTER, disk_cache=False)
+    return build_classes(edge, raster, ClassifyConfig())
+
+
+def test_cubic_o_is_round():
+    glyphs = [FakeGlyph("O", O_ELEMENTS)]
+    edge = build_edge_features(None, glyphs, MASTER, calib=CALIB)
+    assert edge["O"].roundness == 1.0
+    L, R, glyph_to_L, glyph_to_R = _classes(glyphs)
+    assert glyph_to_L["O"] == "L_round" and glyph_to_R["O"] == "R_round"
+
+
+def test_plain_stem_is_default():
+    L, R, glyph_to_L, glyph_to_R = _classes([FakeGlyph("I", I_ELEMENTS)])
+    assert glyph_to_L["I"] == "L_default" and glyph_to_R["I"] == "R_default"
+
+
+def _soa(names, vertical, diagonal, roundness):
+    ones = np.ones(len(names), dtype=np.float32)
+    columns = [np.asarray(c, dtype=np.float32) for c in (vertical, diagonal, roundness)]
+    return EdgeFeaturesSoA(np.array(names, dtype=object), *columns, ones, ones, ones, ones)
+
+
+def _raster(names, ink_L, ink_R, columns=24):
+    # Constant ink per side; the middle columns are always filled.
+    dense = np.ones((len(names), columns), dtype=np.float32)
+    dense[:, :3] = np.asarray(ink_L, dtype=np.float32)[:, None]
+    dense[:, -3:] = np.asarray(ink_R, dtype=np.float32)[:, None]
+    return RasterProfiles(np.array(names, dtype=object), dense, dense, dense)
+
+
+def test_vectorized_codes_match_pick_bucket():
+    combos = range(16)
+    names = [f"g{c:02d}" for c in combos]
+    bit = lambda b: [float(bool(c & b)) for c in combos]
+    edge = _soa(names, bit(4), bit(2), bit(1))
+    # Edge flag set on the left only; the right side always has ink.
+    raster = _raster(names, [1.0 - e for e in bit(8)], [1.0] * 16)
+    _, _, glyph_to_L, glyph_to_R = build_classes(edge, raster, ClassifyConfig())
+
+    for c, name in zip(combos, names):
+        assert glyph_to_L[name] == "L_" + _pick_bucket(c & 1, c & 2, c & 4, c & 8)
+        assert glyph_to_R[name] == "R_" + _pick_bucket(c & 1, c & 2, c & 4, 0)
+
+
+def test_groups_are_sorted_and_disjoint():
+    rng = np.random.default_rng(3)
+    names = [f"g{i:04d}" for i in rng.permutation(500)]
+    edge = _soa(names, *rng.uniform(0, 1, (3, 500)))
+    raster = _raster(names, *rng.uniform(0, 1, (2, 500)))
+    L, R, glyph_to_L, glyph_to_R = build_classes(edge, raster, ClassifyConfig())
+
+    for classes, glyph_to in ((L, glyph_to_L), (R, glyph_to_R)):
+        assert len(classes) > 1
+        members = [g for glyphs in classes.values() for g in glyphs]
+        assert sorted(members) == sorted(names)  # each glyph exactly once
+        for cname, glyphs in classes.items():
+            assert glyphs == sorted(glyphs)
+            assert all(glyph_to[g] == cname for g in glyphs)
+        assert len(glyph_to) == len(names)
+
+
+def test_streaming_matches_batch():
+    glyphs = [
+        FakeGlyph("O", O_ELEMENTS),
+        FakeGlyph("I", I_ELEMENTS),
+        FakeGlyph("V", polygon_elements([(0, 700), (90, 700), (250, 80), (410, 700), (500, 700), (300, 0), (200, 0)])),
+        FakeGlyph("T", polygon_elements([(0, 600), (500, 600), (500, 700), (0, 700)], [(200, 0), (300, 0), (300, 600), (200, 600)])),
+        FakeGlyph("space", []),
+    ]
+    cfg = ClassifyConfig()
+    streamed = build_classes(iter_features(None, glyphs, MASTER, calib=CALIB), None, cfg)
+    # One glyph live at a time: nothing is left in the outline caches.
+    assert not _outline_cache._cache and not _outline_cache._flat_cache
+    assert streamed == _classes(glyphs)
+    assert "space" not in streamed[2]
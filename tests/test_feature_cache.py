@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from fakes import MASTER, FakeFont, FakeGlyph, polygon_elements
+from optikern import _cache, _profile_cache
+from optikern.calibration import CalibrationData
+from optikern.edge_features import build_edge_features
+from optikern.raster_features import build_raster_profiles
+
+CALIB = CalibrationData(vertical_spacing=700.0, diagonal_scale=1.0, round_scale=1.0, topheavy_scale=1.0)
+
+A_ELEMENTS = polygon_elements([(0, 0), (100, 0), (250, 600), (400, 0), (500, 0), (300, 700), (200, 700)])
+ACUTE_ELEMENTS = polygon_elements([(220, 750), (300, 750), (380, 900), (300, 900)])
+
+
+def _font():
+    base = FakeGlyph("A", A_ELEMENTS)
+    composite = FakeGlyph("Aacute", ACUTE_ELEMENTS, components=[base])
+    other = FakeGlyph("I", polygon_elements([(0, 0), (100, 0), (100, 700), (0, 700)]))
+    return FakeFont([base, composite, other])
+
+
+def _edit_base(font):
+    # Redraw "A" as a box: a base edit bumps only the base glyph's lastChange.
+    base = font.glyphs["A"]
+    base.layers["m"].elements = polygon_elements([(0, 0), (500, 0), (500, 700), (0, 700)])
+    base.lastChange = 2
+
+
+def test_base_edit_invalidates_composite_features():
+    font = _font()
+    before = build_edge_features(font, font.glyphs, MASTER, calib=CALIB)["Aacute"]
+    assert ("Aacute", "m", (1, 1)) in _cache._entries
+
+    _edit_base(font)
+    after = build_edge_features(font, font.glyphs, MASTER, calib=CALIB)["Aacute"]
+    assert ("Aacute", "m", (1, 2)) in _cache._entries
+    assert after != before
+    _cache._entries.clear()
+    assert build_edge_features(font, font.glyphs, MASTER, calib=CALIB)["Aacute"] == after
+
+
+def test_base_edit_invalidates_stored_composite_profile(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(_profile_cache, "_ROOT", str(tmp_path))
+    font = _font()
+    before = build_raster_profiles(font, font.glyphs, MASTER).get("Aacute")
+
+    _edit_base(font)
+    capsys.readouterr()
+    after = build_raster_profiles(font, font.glyphs, MASTER).get("Aacute")
+    # "I" is read back; "A" and "Aacute" are sampled again.
+    assert "(3 glyphs, 1 from cache)" in capsys.readouterr().out
+    assert not np.array_equal(after.middle, before.middle)
+    rows, _ = _profile_cache.load(font, MASTER.id, 24, 12)
+    assert ("Aacute", "(1, 2)") in rows and ("Aacute", "(1, 1)") not in rows
+
+
+def test_use_font_drops_other_fonts():
+    font = _font()
+    _cache.use_font(font)
+    build_edge_features(font, font.glyphs, MASTER, calib=CALIB)
+    count = len(_cache._entries)
+
+    _cache.use_font(font)
+    assert len(_cache._entries) == count
+
+    _cache.use_font(FakeFont(masters=[SimpleNamespace(id="other")]))
+    assert not _cache._entries
@@ -0,0 +1,82 @@
+import numpy as np
+
+from fakes import (
+    CLOSE_PATH, CURVE_TO, LINE_TO, MOVE_TO, QUAD_CURVE_TO, FakeBezierPath, FakeGlyph,
+)
+from optikern import _outline_cache
+from optikern._outline_cache import (
+    _FLATNESS, _flatten_edges, _walk_bezier, extract_layer_arrays, flattened_segments,
+)
+
+# An "O"-like closed cubic contour, a quadratic bowl, and an open triangle
+# (no closePath) that filling closes implicitly.
+_ELEMENTS = [
+    (MOVE_TO, [(250, 0)]),
+    (CURVE_TO, [(400, 0), (500, 200), (500, 350)]),
+    (CURVE_TO, [(500, 500), (400, 700), (250, 700)]),
+    (CURVE_TO, [(100, 700), (0, 500), (0, 350)]),
+    (CURVE_TO, [(0, 200), (100, 0), (250, 0)]),
+    (CLOSE_PATH, []),
+    (MOVE_TO, [(600, 0)]),
+    (QUAD_CURVE_TO, [(700, 400), (800, 0)]),
+    (LINE_TO, [(600, 0)]),
+    (CLOSE_PATH, []),
+    (MOVE_TO, [(900, 0)]),
+    (LINE_TO, [(1000, 0)]),
+    (LINE_TO, [(950, 90)]),
+]
+
+
+def _flatten(elements):
+    _, _, edges, edge_kinds, contours = _walk_bezier(FakeBezierPath(elements))
+    return edges, edge_kinds, contours, _flatten_edges(edges, edge_kinds, contours)
+
+
+def test_flattened_contours_are_closed_and_continuous():
+    _, _, contours, (segs, starts) = _flatten(_ELEMENTS)
+    assert len(starts) == 4
+    for a, b in zip(starts[:-1], starts[1:]):
+        contour = segs[a:b]
+        # Exact equality: chord ends are evaluated from identical t values.
+        np.testing.assert_array_equal(contour[1:, 0], contour[:-1, 1])
+        np.testing.assert_array_equal(contour[0, 0], contour[-1, 1])
+
+
+def test_implicit_close_and_lines_stay_single_chords():
+    edges, edge_kinds, contours, (segs, starts) = _flatten(_ELEMENTS)
+    # Open triangle: two lines plus the implicit closing line, nothing else.
+    assert contours[-1] - contours[-2] == 3
+    assert starts[-1] - starts[-2] == 3
+    np.testing.assert_array_equal(segs[-1], [[950, 90], [900, 0]])
+
+
+def test_chords_stay_within_flatness():
+    edges, edge_kinds, _, _ = _flatten(_ELEMENTS)
+    t = np.linspace(0.0, 1.0, 513)[:, None]
+    for i, ((p0, c1, c2, p3), kind) in enumerate(zip(edges, edge_kinds)):
+        segs, _ = _flatten_edges(edges[i:i + 1], edge_kinds[i:i + 1], np.array([0, 1]))
+        if kind == LINE_TO:
+            assert len(segs) == 1
+        if kind == QUAD_CURVE_TO:
+            c1, c2 = p0 + 2 / 3 * (c1 - p0), p3 + 2 / 3 * (c2 - p3)
+        mt = 1 - t
+        curve = mt ** 3 * p0 + 3 * mt * mt * t * c1 + 3 * mt * t * t * c2 + t ** 3 * p3
+        a, b = segs[:, 0], segs[:, 1]
+        ab = b - a
+        rel = curve[:, None] - a
+        u = np.clip((rel * ab).sum(-1) / np.maximum((ab * ab).sum(-1), 1e-12), 0, 1)
+        dist = np.hypot(*(rel - u[..., None] * ab).transpose(2, 0, 1)).min(axis=1)
+        assert dist.max() <= _FLATNESS + 1e-9
+
+
+def test_layers_without_change_token_are_not_cached():
+    glyph = FakeGlyph("O", _ELEMENTS, last_change=None)
+    layer = glyph.layers["m"]
+    assert extract_layer_arrays(layer) is not extract_layer_arrays(layer)
+    assert not _outline_cache._cache
+
+    glyph.lastChange = 1
+    before = flattened_segments(layer)
+    assert flattened_segments(layer) is before
+    glyph.lastChange = 2
+    assert flattened_segments(layer) is not before
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from fakes import MASTER, FakeFont, FakeGlyph, FakeGlyphs, polygon_elements
+from optikern import _profile_cache
+from optikern.raster_features import build_raster_profiles
+
+_FONT = FakeFont()
+
+
+def _glyph(name, width, last_change=1):
+    square = [(0, 0), (width, 0), (width, 300), (0, 300)]
+    notch = [(10, 10), (10, 200), (width // 2, 200), (width // 2, 10)]
+    return FakeGlyph(name, polygon_elements(square, notch), last_change=last_change)
+
+
+@pytest.fixture(autouse=True)
+def _cache_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(_profile_cache, "_ROOT", str(tmp_path))
+    monkeypatch.setattr(_FONT, "glyphs", FakeGlyphs())
+
+
+def _font_glyphs(*glyphs):
+    # The font's glyph list; the tests edit it in place.
+    _FONT.glyphs[:] = glyphs
+    return _FONT.glyphs
+
+
+def _build(glyphs, **kw):
+    return build_raster_profiles(_FONT, glyphs, MASTER, columns=8, samples_per_band=4, **kw)
+
+
+def test_subset_call_keeps_other_glyphs():
+    glyphs = _font_glyphs(_glyph("A", 400), _glyph("B", 300), _glyph("C", 500))
+    _build(glyphs)
+
+    # Redraw B and rebuild only B: A and C must survive in the file.
+    glyphs[1] = _glyph("B", 120, last_change=2)
+    subset = _build(glyphs[1:2])
+    rows, dense = _profile_cache.load(_FONT, MASTER.id, 8, 4)
+    assert sorted(rows) == [("A", "1"), ("B", "2"), ("C", "1")]
+    np.testing.assert_array_equal(dense[2, rows[("B", "2")]], subset.top[0])
+
+    cached = _build(glyphs)
+    fresh = _build(glyphs, disk_cache=False)
+    for band in ("top", "middle", "bottom"):
+        np.testing.assert_array_equal(getattr(cached, band), getattr(fresh, band))
+
+
+def test_deleted_and_renamed_glyphs_are_pruned():
+    glyphs = _font_glyphs(_glyph("A", 400), _glyph("B", 300), _glyph("C", 500))
+    _build(glyphs)
+
+    # C is deleted and A renamed to A.alt; only B is rebuilt.
+    del glyphs[2]
+    glyphs[0].name = "A.alt"
+    glyphs[1] = _glyph("B", 120, last_change=2)
+    _build(glyphs[1:2])
+    rows, dense = _profile_cache.load(_FONT, MASTER.id, 8, 4)
+    assert sorted(rows) == [("B", "2")]
+    assert dense.shape[1] == 1
+
+
+def test_reused_rows_are_not_resampled(capsys):
+    glyphs = _font_glyphs(_glyph("A", 400), _glyph("B", 300))
+    _build(glyphs)
+    capsys.readouterr()
+    _build(glyphs)
+    assert "(2 glyphs, 2 from cache)" in capsys.readouterr().out
+
+
+def test_tokenless_glyphs_are_never_stored():
+    _build(_font_glyphs(_glyph("A", 400, last_change=None)))
+    assert _profile_cache.load(_FONT, MASTER.id, 8, 4) == ({}, None)
+
+
+@pytest.mark.parametrize("content", [b"", b"PK\x03\x04 truncated", b"not a zip at all"])
+def test_damaged_file_is_rebuilt(content):
+    glyphs = _font_glyphs(_glyph("A", 400))
+    _build(glyphs)
+    path = _profile_cache._path(_FONT, MASTER.id, 8, 4)
+    with open(path, "wb") as f:
+        f.write(content)
+    assert _profile_cache.load(_FONT, MASTER.id, 8, 4) == ({}, None)
+
+    _build(glyphs)
+    rows, _ = _profile_cache.load(_FONT, MASTER.id, 8, 4)
+    assert list(rows) == [("A", "1")]
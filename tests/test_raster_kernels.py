@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from optikern import _raster_kernels
+from optikern._raster_kernels import concat_outlines, contour_bounds
+from optikern.raster_features import _unit_grid
+
+
+def _outline(polygons):
+    # (segs, starts) with closing edges, as _flatten_edges returns them.
+    segs, starts = [], [0]
+    for polygon in polygons:
+        polygon = np.asarray(polygon, dtype=np.float64)
+        segs.extend(zip(polygon, np.roll(polygon, -1, axis=0)))
+        starts.append(len(segs))
+    return np.array(segs, dtype=np.float64).reshape(-1, 2, 2), np.array(starts, dtype=np.int64)
+
+
+def _winding(segs, x, y):
+    # Brute-force winding number (point-left-of-edge form).
+    w = 0
+    for (xa, ya), (xb, yb) in segs:
+        side = (xb - xa) * (y - ya) - (x - xa) * (yb - ya)
+        if ya <= y < yb and side > 0:
+            w += 1
+        elif yb <= y < ya and side < 0:
+            w -= 1
+    return w
+
+
+def _random_glyphs(rng, count):
+    glyphs = []
+    for _ in range(count):
+        polygons = []
+        for _ in range(rng.integers(0, 4)):
+            n = rng.integers(3, 12)
+            # Unsorted angles give self-intersecting contours, which is where
+            # nonzero winding and even-odd disagree.
+            angles = rng.uniform(0, 2 * np.pi, n)
+            radii = rng.uniform(20, 300, n)
+            centre = rng.uniform(0, 500, 2)
+            polygons.append(centre + np.c_[np.cos(angles), np.sin(angles)] * radii[:, None])
+        glyphs.append(polygons)
+    # Counter with the same and with the opposite orientation as its outer ring.
+    outer = [(0, 0), (400, 0), (400, 600), (0, 600)]
+    inner = [(100, 100), (300, 100), (300, 500), (100, 500)]
+    glyphs.append([outer, inner[::-1]])
+    glyphs.append([outer, inner])
+    return glyphs
+
+
+def _batch(glyphs, columns, samples_per_band):
+    outlines = [_outline(polygons) for polygons in glyphs]
+    boxes = []
+    for segs, _ in outlines:
+        pts = segs.reshape(-1, 2) if segs.size else np.zeros((1, 2))
+        (x0, y0), (x1, y1) = pts.min(axis=0), pts.max(axis=0)
+        # Uneven padding: a grid symmetric about a contour's diagonal would put
+        # samples exactly on edges, where the two crossing tests may disagree.
+        boxes.append((x0 - 3.0, y0 - 5.0, x1 + 7.0, y1 + 2.0))
+    boxes = np.array(boxes, dtype=np.float64)
+    unit_x, unit_y = _unit_grid(columns, samples_per_band)
+    return outlines, boxes, unit_x, unit_y
+
+
+def _reference(outlines, boxes, unit_x, unit_y):
+    out = np.zeros((len(outlines), unit_x.size, unit_y.size), dtype=np.uint8)
+    for g, ((segs, _), (x_min, y_min, x_max, y_max)) in enumerate(zip(outlines, boxes)):
+        for i, u in enumerate(unit_x):
+            for j, v in enumerate(unit_y):
+                x = x_min + (x_max - x_min) * u
+                y = y_min + (y_max - y_min) * v
+                out[g, i, j] = _winding(segs, x, y) != 0
+    return out
+
+
+@pytest.fixture(scope="module")
+def case():
+    rng = np.random.default_rng(7)
+    outlines, boxes, unit_x, unit_y = _batch(_random_glyphs(rng, 40), 13, 5)
+    segs, starts, glyph_contours = concat_outlines(outlines)
+    expected = _reference(outlines, boxes, unit_x, unit_y)
+    return segs, starts, glyph_contours, boxes, unit_x, unit_y, expected
+
+
+def test_numpy_matches_brute_force(case):
+    segs, starts, glyph_contours, boxes, unit_x, unit_y, expected = case
+    out = np.full(expected.shape, 7, dtype=np.uint8)
+    bounds = contour_bounds(segs, starts)
+    _raster_kernels._count_inside_numpy(
+        segs, starts, bounds, glyph_contours, boxes, unit_x, unit_y, out
+    )
+    np.testing.assert_array_equal(out, expected)
+
+
+@pytest.mark.skipif(_raster_kernels._count_inside_jit is None, reason="Numba not installed")
+def test_jit_matches_brute_force(case):
+    segs, starts, glyph_contours, boxes, unit_x, unit_y, expected = case
+    out = np.full(expected.shape, 7, dtype=np.uint8)
+    _raster_kernels._count_inside_jit(segs, starts, glyph_contours, boxes, unit_x, unit_y, out)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_counters_follow_nonzero_rule(case):
+    *_, expected = case
+    hole, filled = expected[-2], expected[-1]
+    # Column 6 / row 7 is the middle of the counter, column 1 lies in the ring.
+    assert hole[6, 7] == 0  # opposite orientation: winding 0
+    assert filled[6, 7] == 1  # same orientation: winding 2, still inside
+    assert hole[1, 7] == 1 and filled[1, 7] == 1
+
+
+def test_concat_outlines_offsets():
+    a = _outline([[(0, 0), (1, 0), (0, 1)], [(5, 5), (6, 5), (6, 6), (5, 6)]])
+    empty = (np.empty((0, 2, 2)), np.array([0], dtype=np.int64))
+    b = _outline([[(0, 0), (2, 0), (0, 2)]])
+    segs, starts, glyph_contours = concat_outlines([a, empty, b])
+    assert segs.shape == (10, 2, 2)
+    np.testing.assert_array_equal(starts, [0, 3, 7, 10])
+    np.testing.assert_array_equal(glyph_contours, [0, 2, 2, 3])